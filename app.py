@@ -5,7 +5,7 @@ import pandas as pd
 from datetime import datetime
 from recommender import Recommender
 from resume_parser import parse_resume_with_llm
-from utils import save_student_profile, STUDENT_FILE, ensure_companies_loaded
+from utils import save_student_profile, STUDENT_FILE, ensure_companies_loaded, CSV_READ_KWARGS, file_stamp
 
 # Setup
 st.set_page_config(layout="wide", page_title="PM Internship Matcher (Streamlit)")
@@ -15,11 +15,29 @@ DATA_DIR = Path(".")
 COMPANIES_CSV = DATA_DIR / "companies.csv"
 STUDENTS_CSV = DATA_DIR / STUDENT_FILE
 
-# Ensure companies file exists (raises helpful error)
-companies_df = ensure_companies_loaded(COMPANIES_CSV)
+# Cached loaders survive Streamlit reruns; keyed by file mtime so edits to companies.csv are picked up
+@st.cache_data(show_spinner=False)
+def load_companies(path, mtime):
+    # Ensure companies file exists (raises helpful error)
+    return ensure_companies_loaded(path)
 
-# instantiate recommender (loads model & precomputes embeddings)
-recommender = Recommender(companies_df)
+@st.cache_resource(show_spinner="Loading recommender model...", max_entries=1)
+def get_recommender(mtime):
+    # loads model & precomputes embeddings once per process
+    return Recommender(load_companies(COMPANIES_CSV, mtime))
+
+companies_mtime = COMPANIES_CSV.stat().st_mtime if COMPANIES_CSV.exists() else 0.0
+# Ensure companies file is readable at startup (cheap, cached; the model itself loads on first recommend)
+companies_df = load_companies(COMPANIES_CSV, companies_mtime)
+
+@st.cache_data(ttl=5, show_spinner=False)
+def load_students(path, stamp):
+    # keyed by the same (mtime_ns, size) stamp save_student_profile checks, so saves invalidate it;
+    # ttl bounds staleness from other sessions
+    return pd.read_csv(path, **CSV_READ_KWARGS)
+
+# per-session email → row index, so saves don't re-scan students.csv while it is unchanged
+email_index = st.session_state.setdefault("_email_idx", {})
 
 # Sidebar: navigation
 st.sidebar.header("Navigation")
@@ -66,13 +84,13 @@ if page == "Register (Manual)":
             )
 
             # save
-            saved = save_student_profile(record)
+            saved = save_student_profile(record, STUDENTS_CSV, email_index=email_index)
             st.success(f"Profile saved for {saved['name']} ({saved['email']})")
 
             # run recommender
             candidate_text = " ".join([saved["education"], saved["skills"], saved["sector_interests"], saved["experience"]])
             candidate_skills = saved["skills"]
-            results = recommender.recommend(candidate_text, candidate_skills, candidate_location_pref=saved["location_pref"], is_rural=saved["is_rural"], top_k=5)
+            results = get_recommender(companies_mtime).recommend(candidate_text, candidate_skills, candidate_location_pref=saved["location_pref"], is_rural=saved["is_rural"], top_k=5)
 
             st.subheader("Top recommendations")
             for r in results:
@@ -117,12 +135,12 @@ elif page == "Upload Resume":
             record = build_student_record_from_inputs(
                 name, email, education, skills, sector_interests, location_pref, experience, is_rural, "resume"
             )
-            saved = save_student_profile(record)
+            saved = save_student_profile(record, STUDENTS_CSV, email_index=email_index)
             st.success(f"Profile saved for {saved['name']} ({saved['email']})")
 
             # recommend
             candidate_text = " ".join([saved["education"], saved["skills"], saved["sector_interests"], saved["experience"]])
-            results = recommender.recommend(candidate_text, saved["skills"], candidate_location_pref=saved["location_pref"], is_rural=saved["is_rural"], top_k=5)
+            results = get_recommender(companies_mtime).recommend(candidate_text, saved["skills"], candidate_location_pref=saved["location_pref"], is_rural=saved["is_rural"], top_k=5)
             st.subheader("Top recommendations")
             for r in results:
                 st.markdown(f"**{r['PostedRole']} @ {r['CompanyName']}** — {r['Location']} — Stipend: {r.get('Stipend','N/A')}")
@@ -135,7 +153,7 @@ elif page == "Company Preview":
     st.header("Company Preview — Registered Students")
     st.markdown("This preview shows `students.csv` so companies can see registered students and their skills.")
     if STU := Path(STUDENTS_CSV).exists():
-        df = pd.read_csv(STUDENTS_CSV)
+        df = load_students(STUDENTS_CSV, file_stamp(STUDENTS_CSV))
         st.write(f"Total registered: {len(df)}")
         st.dataframe(df)
         st.markdown("You can copy this CSV or download it:")
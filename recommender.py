@@ -2,22 +2,41 @@
 import pandas as pd
 import numpy as np
 import re
-from sentence_transformers import SentenceTransformer
+import functools
 import os
+import hashlib
+import importlib.util
+import logging
+from pathlib import Path
 
 MODEL_NAME = os.getenv("SENT_MODEL", "all-MiniLM-L6-v2")
+# "onnx" / "openvino" need sentence-transformers >= 3.2 with the matching runtime; "torch" is the plain PyTorch path
+MODEL_BACKEND = os.getenv("SENT_BACKEND", "onnx")
+# e.g. "onnx/model_qint8_avx512.onnx" for the int8-quantized export; empty uses the default model.onnx
+ONNX_FILE = os.getenv("SENT_ONNX_FILE", "")
+EMB_CACHE_DIR = os.getenv("EMB_CACHE_DIR", ".")
+
+logger = logging.getLogger(__name__)
+
+_RE_NONALNUM = re.compile(r"[^a-z0-9, ]+")
+_RE_WS = re.compile(r"\s+")
+_RE_SPLIT = re.compile(r"[,;\n]| and ")
 
 def normalize_text(s):
     if not isinstance(s, str):
         return ""
+    return _normalize_str(s)
+
+@functools.lru_cache(maxsize=4096)
+def _normalize_str(s):
     s = s.lower()
-    s = re.sub(r"[^a-z0-9, ]+", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _RE_NONALNUM.sub(" ", s)
+    s = _RE_WS.sub(" ", s).strip()
     return s
 
 def parse_skills(text):
     text = normalize_text(text)
-    parts = re.split(r"[,;\n]| and ", text)
+    parts = _RE_SPLIT.split(text)
     skills = [p.strip() for p in parts if p.strip()]
     return list(dict.fromkeys(skills))
 
@@ -33,52 +52,224 @@ def _normalize_embeddings(embs):
     norms[norms == 0] = 1.0
     return embs / norms
 
+# modules each non-torch backend needs; sentence-transformers re-raises their absence as a plain Exception
+_BACKEND_RUNTIMES = {"onnx": "optimum.onnxruntime", "openvino": "optimum.intel"}
+
+def _backend_available(backend):
+    module = _BACKEND_RUNTIMES.get(backend)
+    if module is None:
+        return True  # unknown backend: let sentence-transformers report it
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ImportError:  # parent package (optimum) missing
+        return False
+
+def _load_model():
+    """Load the sentence encoder on CPU, preferring MODEL_BACKEND and falling back to PyTorch."""
+    # imported here so pages that never recommend don't pay the transformers import
+    from sentence_transformers import SentenceTransformer
+    if MODEL_BACKEND != "torch":
+        if not _backend_available(MODEL_BACKEND):
+            logger.warning("Could not load %s backend for %s, falling back to torch: %s is not installed",
+                           MODEL_BACKEND, MODEL_NAME, _BACKEND_RUNTIMES[MODEL_BACKEND])
+        else:
+            model_kwargs = {"file_name": ONNX_FILE} if ONNX_FILE else None
+            try:
+                return SentenceTransformer(MODEL_NAME, device="cpu", backend=MODEL_BACKEND, model_kwargs=model_kwargs), MODEL_BACKEND
+            except TypeError as e:
+                # sentence-transformers < 3.2 has no backend kwarg; other errors (bad SENT_ONNX_FILE,
+                # download failures) propagate instead of silently switching backends
+                logger.warning("Could not load %s backend for %s, falling back to torch: %s", MODEL_BACKEND, MODEL_NAME, e)
+    return SentenceTransformer(MODEL_NAME, device="cpu"), "torch"
+
+def _load_cached_embeddings(path, n_rows):
+    """Cached embeddings from path, or None on a miss (absent, unreadable or wrong shape)."""
+    try:
+        emb = np.load(path)
+    except (OSError, ValueError, EOFError):
+        return None
+    if emb.ndim != 2 or len(emb) != n_rows:
+        return None
+    return emb
+
+def _save_cached_embeddings(path, emb):
+    """Write to a temp file and rename into place, so an interrupted save never leaves a truncated cache."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            np.save(f, emb)
+        os.replace(tmp, path)
+    except OSError:
+        # read-only deployments just skip the cache
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+def _popcount_rows(a):
+    """Number of set bits per row of a 2D uint64 array."""
+    if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+        return np.bitwise_count(a).sum(axis=1, dtype=np.int64)
+    a = np.ascontiguousarray(a)
+    return np.unpackbits(a.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+
+def _jaccard_masks(masks, cand, unknown):
+    """Jaccard of each row of masks (N, W uint64) against cand (W,); unknown adds to every union."""
+    inter = _popcount_rows(masks & cand)
+    # candidate skills missing from the vocabulary can only grow the union
+    union = _popcount_rows(masks | cand) + unknown
+    out = np.zeros(len(union), dtype=np.float32)
+    np.divide(inter, union, out=out, where=union > 0, casting="unsafe")
+    return out
+
+@functools.lru_cache(maxsize=None)
+def _jaccard_kernel():
+    """Numba jaccard kernel when numba is installed, else the NumPy popcount path."""
+    try:
+        from numba import njit
+    except ImportError:  # numba is optional
+        return _jaccard_masks
+
+    @njit(cache=True, inline="always")
+    def _popcount64(x):
+        # SWAR popcount; LLVM lowers this to a native popcnt where available
+        x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+        x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+        x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+        return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+    # serial on purpose: Streamlit sessions run in threads, and concurrent calls into a
+    # parallel=True function abort the process on numba's workqueue threading layer
+    @njit(fastmath=True, cache=True)
+    def _jaccard_masks_jit(masks, cand, unknown):
+        n, w = masks.shape
+        out = np.empty(n, dtype=np.float32)
+        for i in range(n):
+            inter = 0
+            union = unknown
+            for j in range(w):
+                inter += _popcount64(masks[i, j] & cand[j])
+                union += _popcount64(masks[i, j] | cand[j])
+            out[i] = inter / union if union else 0.0
+        return out
+
+    return _jaccard_masks_jit
+
 class Recommender:
     def __init__(self, companies_df):
-        self.companies = companies_df.copy()
-        for c in self.companies.columns:
-            self.companies[c] = self.companies[c].fillna("")
+        # blank cells must be "" (not NaN): NaN text drops the row from combined_text and shows up as "nan"
+        # in the records. Cheap no-op for frames read via utils.ensure_companies_loaded; fillna returns a new
+        # frame, so no separate copy
+        text_cols = ['SkillsRequired', 'PostedRole', 'Industry', 'CompanyName', 'Sector', 'Location']
+        self.companies = companies_df.fillna("").astype({c: str for c in text_cols})
         self.companies['combined_text'] = (
-            self.companies['SkillsRequired'].astype(str) + " " +
-            self.companies['PostedRole'].astype(str) + " " +
-            self.companies['Industry'].astype(str)
+            self.companies['SkillsRequired'] + " " +
+            self.companies['PostedRole'] + " " +
+            self.companies['Industry']
         )
         # auto-detect IsGovernment from CompanyName or Sector
         gov_keywords = ["ngo","gov","government","public sector","psu","co-op","cooperative","council","trust","rural development","community development"]
-        def detect_gov(row):
-            t = f"{row.get('CompanyName','')} {row.get('Sector','')}".lower()
-            return any(k in t for k in gov_keywords)
-        self.companies['IsGovernment'] = self.companies.apply(detect_gov, axis=1)
+        gov_pattern = "|".join(map(re.escape, gov_keywords))
+        self.companies['IsGovernment'] = (
+            self.companies['CompanyName'].str.lower() + " " +
+            self.companies['Sector'].str.lower()
+        ).str.contains(gov_pattern, regex=True, na=False)
 
-        # load model and compute embeddings
-        self.model = SentenceTransformer(MODEL_NAME, device="cpu")
+        # precompute per-company features so recommend() only works on the candidate side
+        skill_sets = [frozenset(parse_skills(s)) for s in self.companies['SkillsRequired']]
+        # skills as bitmasks over a shared vocabulary (stacked 64-bit lanes) -> jaccard via popcount
+        self._vocab = {skill: idx for idx, skill in enumerate(sorted(set().union(*skill_sets)))}
+        self._n_lanes = max(1, (len(self._vocab) + 63) // 64)
+        self._company_masks = np.stack([self._skill_mask(s)[0] for s in skill_sets]) if skill_sets \
+            else np.zeros((0, self._n_lanes), dtype=np.uint64)
+        self._jaccard = _jaccard_kernel()
+        self._candidate_mask = functools.lru_cache(maxsize=256)(self._candidate_mask_uncached)
+        self._loc_norm = np.array([normalize_text(x) for x in self.companies['Location']], dtype=str)
+        self._gov_bonus = self.companies['IsGovernment'].to_numpy(dtype=np.float32)
+
+        # load model and compute embeddings (or reuse the on-disk cache for identical texts)
+        self.model, backend = _load_model()
+        # per-instance LRU over the normalized candidate text (string key only, model stays out of the key)
+        self._embed = functools.lru_cache(maxsize=256)(self._embed_uncached)
         texts = self.companies['combined_text'].apply(normalize_text).tolist()
-        emb = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=True)
-        self.embeddings = _normalize_embeddings(emb)
+        key = hashlib.sha1("\n".join([MODEL_NAME, backend, ONNX_FILE] + texts).encode("utf-8")).hexdigest()
+        cache_path = Path(EMB_CACHE_DIR) / f".emb_cache_{key}.npy"
+        self.embeddings = _load_cached_embeddings(cache_path, len(texts))
+        if self.embeddings is None:
+            # stored as float16 to halve memory traffic in the similarity step; upcast per tile at query time
+            self.embeddings = self._encode_corpus(texts).astype(np.float16)
+            _save_cached_embeddings(cache_path, self.embeddings)
+
+    def _candidate_mask_uncached(self, candidate_skills):
+        """Parse the candidate skills once and encode them against the company vocabulary."""
+        mask, unknown = self._skill_mask(frozenset(parse_skills(candidate_skills)))
+        mask.flags.writeable = False
+        return mask, unknown
+
+    def _embed_uncached(self, text_norm):
+        """Normalized embedding of one candidate text; returned read-only since it is shared via the cache."""
+        emb = self.model.encode([text_norm], convert_to_numpy=True, show_progress_bar=False)
+        emb = _normalize_embeddings(emb)[0]
+        emb.flags.writeable = False
+        return emb
+
+    def _encode_corpus(self, texts, batch_size=64):
+        """Encode texts sorted by length so batches pad less, then restore the original order."""
+        if not texts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        order = np.argsort([len(t) for t in texts], kind="stable")
+        emb = self.model.encode([texts[i] for i in order], batch_size=batch_size, convert_to_numpy=True,
+                                normalize_embeddings=True, show_progress_bar=False)
+        return emb[np.argsort(order)]
+
+    def _skill_mask(self, skills):
+        """Encode skills as a uint64 lane mask; also returns the count of skills outside the vocabulary."""
+        mask = np.zeros(self._n_lanes, dtype=np.uint64)
+        unknown = 0
+        for skill in skills:
+            idx = self._vocab.get(skill)
+            if idx is None:
+                unknown += 1
+                continue
+            mask[idx >> 6] |= np.uint64(1) << np.uint64(idx & 63)
+        return mask, unknown
+
+    def _cosine_sim(self, cand_emb, tile=4096):
+        """Dot product of the float16 embeddings with cand_emb, upcasting in row tiles (cosine since normalized)."""
+        cand_emb = cand_emb.astype(np.float32)
+        sim = np.empty(len(self.embeddings), dtype=np.float32)
+        for start in range(0, len(self.embeddings), tile):
+            stop = start + tile
+            sim[start:stop] = self.embeddings[start:stop].astype(np.float32) @ cand_emb
+        return sim
 
     def recommend(self, candidate_text, candidate_skills, candidate_location_pref=None, is_rural=False, top_k=5,
                   weights={'embed':0.7, 'jaccard':0.2, 'location':0.05, 'gov':0.05}):
-        cand_emb = self.model.encode([normalize_text(candidate_text)], convert_to_numpy=True, show_progress_bar=False)
-        cand_emb = _normalize_embeddings(cand_emb)[0]
-        sim = np.dot(self.embeddings, cand_emb)  # cosine since normalized
+        cand_emb = self._embed(normalize_text(candidate_text))
+        sim = self._cosine_sim(cand_emb)
 
-        jaccard = self.companies['SkillsRequired'].apply(lambda r: jaccard_score(parse_skills(candidate_skills), parse_skills(r))).values
+        cand_mask, cand_unknown = self._candidate_mask(candidate_skills)
+        jaccard = self._jaccard(self._company_masks, cand_mask, cand_unknown)
 
-        if candidate_location_pref:
-            loc = normalize_text(candidate_location_pref)
-            location_bonus = self.companies['Location'].apply(lambda r: 1.0 if loc and loc in normalize_text(r) else 0.0).values
-        else:
-            location_bonus = np.zeros(len(self.companies))
+        final_score = (weights['embed'] * sim) + (weights['jaccard'] * jaccard)
 
-        if is_rural:
-            gov_bonus = self.companies['IsGovernment'].apply(lambda x: 1.0 if x else 0.0).values
-        else:
-            gov_bonus = np.zeros(len(self.companies))
+        # location and gov bonuses are only added when they apply, so no zero arrays are built
+        loc = normalize_text(candidate_location_pref) if candidate_location_pref else ""
+        if loc:
+            final_score += weights['location'] * (np.char.find(self._loc_norm, loc) >= 0)
 
-        final_score = (weights['embed'] * sim) + (weights['jaccard'] * jaccard) + (weights['location'] * location_bonus) + (weights['gov'] * gov_bonus)
+        if is_rural:
+            final_score += weights['gov'] * self._gov_bonus
 
-        res = self.companies.copy()
-        res['score'] = final_score
-        res = res.sort_values('score', ascending=False).head(top_k)
+        # top-k selection on indices only: O(N) partition + O(k log k) sort of the winners
+        n = len(final_score)
+        if top_k <= 0 or n == 0:
+            return []
+        if top_k >= n:
+            idx = np.argsort(-final_score, kind="stable")
+        else:
+            idx = np.argpartition(-final_score, top_k)[:top_k]
+            idx = idx[np.argsort(-final_score[idx], kind="stable")]
+        res = self.companies.iloc[idx].assign(score=final_score[idx])
         # convert to list of dicts
         return res.to_dict(orient="records")
@@ -1,8 +1,6 @@
 # resume_parser.py
-import re, json, os, io
-from groq import Groq
+import re, json, os, functools
 from dotenv import load_dotenv
-from PyPDF2 import PdfReader
 import streamlit as st
 
 load_dotenv()
@@ -10,20 +8,43 @@ try:
     GROQ_KEY = st.secrets["GROQ_API_KEY"]
 except Exception:
     GROQ_KEY = os.getenv("GROQ_API_KEY", "")
-groq_client = Groq(api_key=GROQ_KEY) if GROQ_KEY else None
+MAX_RESUME_CHARS = 20000
+
+
+@functools.lru_cache(maxsize=None)
+def get_groq_client():
+    """Groq client, created on first use so pages without resume upload skip importing groq."""
+    if not GROQ_KEY:
+        return None
+    from groq import Groq
+    return Groq(api_key=GROQ_KEY)
 
 
 def extract_text_from_pdf_bytes(b: bytes) -> str:
     """Extract text from PDF bytes safely."""
+    # outside the try so a missing pypdfium2 install fails loudly instead of looking like an unreadable PDF
+    import pypdfium2 as pdfium
     try:
-        reader = PdfReader(io.BytesIO(b))
-        return " ".join([p.extract_text() or "" for p in reader.pages])
+        pdf = pdfium.PdfDocument(b)
+        try:
+            parts, size = [], 0
+            for page in pdf:
+                t = page.get_textpage().get_text_range()
+                parts.append(t)
+                size += len(t)
+                # trailing pages past this point don't improve the LLM parse
+                if size >= MAX_RESUME_CHARS:
+                    break
+            return " ".join(parts)
+        finally:
+            pdf.close()
     except Exception:
         return ""
 
 
 def safe_json_from_llm(text: str, model_name: str = "llama-3.1-8b-instant"):
     """Send resume text to Groq LLM and get structured JSON back."""
+    groq_client = get_groq_client()
     if not groq_client:
         raise RuntimeError("GROQ_API_KEY not set in environment.")
 
@@ -45,26 +66,17 @@ Resume text:
 {cleaned}
 """
 
+    # JSON mode constrains the model to a single valid JSON object, so no prose to strip
     response = groq_client.chat.completions.create(
         model=model_name,
-        messages=[
-            {"role": "system", "content": "You are a helpful structured-data extractor."},
-            {"role": "user", "content": prompt},
-        ],
+        messages=[{"role": "user", "content": prompt}],
         temperature=0.0,
-        max_tokens=800,
+        max_tokens=512,
+        response_format={"type": "json_object"},
     )
 
-    raw = response.choices[0].message.content.strip()
-
-    # Extract first {...}
-    m = re.search(r"\{.*\}", raw, re.DOTALL)
-    if not m:
-        raise ValueError("LLM did not return JSON-like output.")
-
-    json_str = m.group()
     try:
-        parsed = json.loads(json_str)
+        parsed = json.loads(response.choices[0].message.content)
     except Exception as e:
         raise ValueError("Failed to parse JSON from LLM output: " + str(e))
 
@@ -125,18 +137,32 @@ def fallback_extract(text: str):
     }
 
 
+@st.cache_data(show_spinner=False, max_entries=64)
+def _extract_text(b: bytes) -> str:
+    """Cached PDF text extraction, so Streamlit reruns with the same upload skip re-parsing."""
+    return extract_text_from_pdf_bytes(b)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _llm_parse(text: str) -> dict:
+    """Cached LLM parse; failures raise and are not cached."""
+    return safe_json_from_llm(text)
+
+
 def parse_resume_with_llm(file_bytes: bytes):
     """Main entrypoint for Streamlit. Takes resume file bytes and returns parsed JSON."""
     try:
-        text = extract_text_from_pdf_bytes(file_bytes)
+        text = _extract_text(file_bytes)
         if not text.strip():
             text = file_bytes.decode("utf-8", errors="ignore")
+    except ImportError:
+        raise
     except Exception:
         text = file_bytes.decode("utf-8", errors="ignore")
 
     # Try LLM
     try:
-        return safe_json_from_llm(text)
+        return _llm_parse(text)
     except Exception:
         # Fallback if LLM fails
         return fallback_extract(text)
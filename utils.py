@@ -1,49 +1,88 @@
 # utils.py
 import os
+import csv
 import pandas as pd
 
 STUDENT_FILE = "students.csv"
 
+# read every column as plain text: skips dtype inference and the NaN scan, so blanks stay ""
+CSV_READ_KWARGS = dict(dtype=str, keep_default_na=False, na_filter=False)
+
 def ensure_companies_loaded(path):
     if not os.path.exists(path):
         raise FileNotFoundError(f"{path} not found. Please place companies.csv in project root.")
-    return pd.read_csv(path)
+    return pd.read_csv(path, **CSV_READ_KWARGS)
+
+def file_stamp(filepath):
+    """(mtime_ns, size) of a file; changes on every write, even within one coarse mtime tick."""
+    stat = os.stat(filepath)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _build_email_index(filepath, email_index):
+    """Scan the CSV once and fill email_index with its header, email → row number, and the file stamp."""
+    with open(filepath, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        rows = {row.get("email"): i for i, row in enumerate(reader)}
+        email_index.update(fieldnames=reader.fieldnames or [], rows=rows, stamp=file_stamp(filepath))
+    return email_index
 
-def save_student_profile(record, filepath=STUDENT_FILE):
+def save_student_profile(record, filepath=STUDENT_FILE, email_index=None):
     """
     Save or update a student profile in the CSV file.
 
     Args:
         record (dict): Student profile as a dictionary with column names as keys.
         filepath (str): Path to the CSV file.
+        email_index (dict, optional): Caller-owned cache of the file's emails (e.g. kept in
+            st.session_state). Reused while the file is unchanged, so the CSV isn't re-scanned per save.
 
     Returns:
         dict: The saved/updated student record.
     """
-    # Load existing dataframe or create new
+    email = record.get("email", None)
+    if not email:
+        raise ValueError("Record must contain an 'email' field to identify student.")
+    if email_index is None:
+        email_index = {}
+
+    # Fast path: new student whose fields fit the existing header → append a single row
     if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
-        df = pd.read_csv(filepath)
+        if email_index.get("stamp") != file_stamp(filepath):
+            _build_email_index(filepath, email_index)
+        fieldnames = email_index["fieldnames"]
+        if email not in email_index["rows"] and all(k in fieldnames for k in record.keys()):
+            with open(filepath, "a", newline="", encoding="utf-8") as f:
+                csv.DictWriter(f, fieldnames=fieldnames, restval="", lineterminator="\n").writerow(record)
+            email_index["rows"][email] = len(email_index["rows"])
+            email_index["stamp"] = file_stamp(filepath)
+            return record
+        df = pd.read_csv(filepath, **CSV_READ_KWARGS)
     else:
-        df = pd.DataFrame(columns=record.keys())
+        with open(filepath, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(record.keys()), lineterminator="\n")
+            writer.writeheader()
+            writer.writerow(record)
+        email_index.update(fieldnames=list(record.keys()), rows={email: 0}, stamp=file_stamp(filepath))
+        return record
 
+    # Slow path: update an existing student or widen the header
     # Ensure all record keys exist in dataframe columns
     for key in record.keys():
         if key not in df.columns:
             df[key] = ""
 
-    email = record.get("email", None)
-    if not email:
-        raise ValueError("Record must contain an 'email' field to identify student.")
-
     # If student already exists → update
-    if "email" in df.columns and email in df["email"].values:
+    match = df["email"].to_numpy() == email if "email" in df.columns else None
+    if match is not None and match.any():
         for k, v in record.items():
-            df.loc[df["email"] == email, k] = v
+            df.loc[match, k] = str(v)
     else:
         # Append new record
         df = pd.concat([df, pd.DataFrame([record])], ignore_index=True)
 
     # Save back to CSV
     df.to_csv(filepath, index=False)
+    # the rewrite may add columns/rows; re-scan on the next save
+    email_index.clear()
 
     return record
\ No newline at end of file